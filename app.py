@@ -3,9 +3,11 @@ Flask приложение для кредитного калькулятора.
 """
 
 import os
+import logging
+import sqlite3
 from datetime import datetime
 from flask import Flask, render_template, request, jsonify, send_file
-from calculator import calculate_loan
+from result_cache import ResultCache, cached_calculate_loan
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.utils import get_column_letter
@@ -18,6 +20,18 @@ os.makedirs('static/css', exist_ok=True)
 os.makedirs('static/js', exist_ok=True)
 os.makedirs('templates', exist_ok=True)
 
+# Необязательный общий кэш результатов (включается через LOAN_CACHE_PATH).
+# Прогрев выполняется отдельно: python result_cache.py <кэш> <предложения.json>
+result_cache = None
+if os.environ.get('LOAN_CACHE_PATH'):
+    try:
+        result_cache = ResultCache(
+            os.environ['LOAN_CACHE_PATH'],
+            max_entries=int(os.environ.get('LOAN_CACHE_MAX_ENTRIES', 10000))
+        )
+    except (OSError, ValueError, sqlite3.Error):
+        logging.getLogger(__name__).exception('Кэш результатов отключён')
+
 
 @app.route('/')
 def index():
@@ -35,24 +49,16 @@ def api_calculate():
         rate = float(data.get('rate', 0))
         term_months = int(data.get('term_months', 0))
         start_date = data.get('start_date')
-        early_payments = data.get('early_payments', {})
-        
-        # Конвертируем early_payments в правильный формат
-        formatted_early_payments = {}
-        if early_payments:
-            for month_str, payment_data in early_payments.items():
-                month = int(month_str)
-                formatted_early_payments[month] = {
-                    'amount': float(payment_data['amount']),
-                    'mode': payment_data.get('mode', 'reduce_payment')
-                }
+        # Формат досрочных платежей приводится в cached_calculate_loan
+        early_payments = data.get('early_payments')
         
-        result = calculate_loan(
+        result = cached_calculate_loan(
+            result_cache,
             principal=principal,
             rate=rate,
             term_months=term_months,
             start_date=start_date,
-            early_payments=formatted_early_payments if formatted_early_payments else None
+            early_payments=early_payments
         )
         
         return jsonify(result)
@@ -80,6 +80,17 @@ def calculate_loan(
     }
 
 
+def get_payment_date(start: datetime, month: int) -> datetime:
+    """
+    Возвращает дату платежа за указанный месяц графика.
+    
+    Args:
+        start: Дата получения кредита
+        month: Номер месяца (с 1)
+    """
+    return start + timedelta(days=30 * (month - 1))
+
+
 def generate_payment_schedule(
     principal: float,
     rate: float,
@@ -118,7 +129,7 @@ def generate_payment_schedule(
     
     while remaining_balance > 0.01 and current_month <= term_months * 3:  # Защита от бесконечного цикла
         # Дата платежа
-        payment_date = start + timedelta(days=30 * (current_month - 1))
+        payment_date = get_payment_date(start, current_month)
         
         # Проценты за месяц
         interest_paid = remaining_balance * monthly_rate
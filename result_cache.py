@@ -0,0 +1,359 @@
+"""
+Общий для всех воркеров кэш результатов расчёта кредита на базе SQLite.
+
+Прогрев кэша популярными предложениями выполняется один раз отдельной командой:
+
+    python result_cache.py cache/results.db popular_offers.json
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+import calculator
+from calculator import calculate_loan, get_payment_date
+
+logger = logging.getLogger(__name__)
+
+# Версия формата ключей и значений. Увеличивать при изменении структуры кэша.
+CACHE_FORMAT_VERSION = 3
+
+
+def _calculator_version() -> str:
+    """
+    Версия кэша: формат плюс хэш файла calculator.py.
+
+    Меняется при любой правке калькулятора. Вызывается только при создании
+    ResultCache, чтобы недоступный файл не мешал запуску приложения без кэша.
+    """
+    with open(calculator.__file__, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:16]
+    return f'{CACHE_FORMAT_VERSION}:{digest}'
+
+
+def normalize_early_payments(
+    early_payments: Optional[Dict]
+) -> Optional[Dict[int, Dict]]:
+    """
+    Приводит досрочные платежи к виду, который ожидает calculate_loan.
+
+    Номера месяцев становятся int (calculate_loan ищет их как int),
+    суммы - float, режим подставляется по умолчанию.
+
+    Returns:
+        dict | None: {месяц: {amount, mode}} или None, если платежей нет
+    """
+    if not early_payments:
+        return None
+
+    return {
+        int(month): {
+            'amount': float(payment['amount']),
+            'mode': payment.get('mode', 'reduce_payment')
+        }
+        for month, payment in early_payments.items()
+    }
+
+
+def make_cache_key(
+    principal: float,
+    rate: float,
+    term_months: int,
+    early_payments: Optional[Dict[int, Dict]] = None
+) -> str:
+    """
+    Строит канонический ключ кэша по входным параметрам calculate_loan.
+
+    Одинаковые по смыслу запросы (например, 1000000 и 1000000.0, разный
+    порядок досрочных платежей) дают одинаковый ключ. Дата получения
+    кредита в ключ не входит: от неё зависят только даты платежей, которые
+    подставляются после чтения из кэша (см. apply_start_date). Досрочные
+    платежи должны быть предварительно нормализованы normalize_early_payments.
+
+    Returns:
+        str: JSON-строка с отсортированными ключами
+    """
+    canonical_early = {
+        str(month): payment for month, payment in (early_payments or {}).items()
+    }
+
+    return json.dumps({
+        'principal': float(principal),
+        'rate': float(rate),
+        'term_months': int(term_months),
+        'early_payments': canonical_early
+    }, sort_keys=True, separators=(',', ':'))
+
+
+def apply_start_date(result: Dict, start_date: str) -> Dict:
+    """
+    Пересчитывает даты платежей в результате под указанную дату получения кредита.
+
+    Returns:
+        dict: Тот же результат с обновлёнными payment_date
+    """
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    for payment in result['payment_schedule']:
+        payment['payment_date'] = get_payment_date(
+            start, payment['month']
+        ).strftime('%Y-%m-%d')
+    return result
+
+
+class ResultCache:
+    """
+    Персистентный кэш результатов calculate_loan в файле SQLite.
+
+    Файл разделяется всеми процессами (WSGI-воркерами), поэтому кэш
+    остаётся тёплым после перезапуска. Размер ограничен max_entries:
+    раз в evict_every вставок количество записей проверяется, и при
+    переполнении давно не использовавшиеся записи удаляются до 90% лимита.
+    Время последнего обращения обновляется не чаще раза в touch_interval
+    секунд, поэтому вытеснение LRU приблизительное. Ключи хранятся с
+    префиксом версии калькулятора, поэтому воркеры со старым кодом во время
+    обновления не смешивают свои результаты с новыми.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 10000,
+        evict_every: int = 100,
+        touch_interval: float = 60.0
+    ):
+        """
+        Args:
+            path: Путь к файлу базы данных
+            max_entries: Максимальное количество записей в кэше
+            evict_every: Через сколько вставок проверять переполнение
+            touch_interval: Минимальный интервал обновления last_used (сек.)
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.evict_every = evict_every
+        self.touch_interval = touch_interval
+        self.version = _calculator_version()
+        self._local = threading.local()
+        self._inserts = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Отдельное соединение только для схемы: после fork() (gunicorn --preload)
+        # воркеры не должны унаследовать открытое соединение
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        try:
+            with conn:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS results ('
+                    'key TEXT PRIMARY KEY, '
+                    'value TEXT NOT NULL, '
+                    'last_used REAL NOT NULL)'
+                )
+                conn.execute(
+                    'CREATE INDEX IF NOT EXISTS idx_results_last_used '
+                    'ON results (last_used)'
+                )
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS meta ('
+                    'name TEXT PRIMARY KEY, value TEXT NOT NULL)'
+                )
+                row = conn.execute(
+                    "SELECT value FROM meta WHERE name = 'version'"
+                ).fetchone()
+                if row is None or row[0] != self.version:
+                    # Калькулятор или формат изменились - старые результаты недействительны
+                    conn.execute('DELETE FROM results')
+                    conn.execute(
+                        "INSERT OR REPLACE INTO meta (name, value) VALUES ('version', ?)",
+                        (self.version,)
+                    )
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Возвращает соединение текущего потока и процесса (создаёт при необходимости)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _versioned(self, key: str) -> str:
+        return f'{self.version}|{key}'
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Возвращает сохранённый результат или None."""
+        key = self._versioned(key)
+        conn = self._connect()
+        row = conn.execute(
+            'SELECT value, last_used FROM results WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        now = time.time()
+        if now - row[1] >= self.touch_interval:
+            with conn:
+                conn.execute(
+                    'UPDATE results SET last_used = ? WHERE key = ?',
+                    (now, key)
+                )
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Dict):
+        """Сохраняет результат и периодически вытесняет старые записи."""
+        key = self._versioned(key)
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO results (key, value, last_used) '
+                'VALUES (?, ?, ?)',
+                (key, json.dumps(value), time.time())
+            )
+
+        self._inserts += 1
+        if self._inserts % self.evict_every == 0:
+            self.evict()
+
+    def evict(self):
+        """Удаляет давно не использовавшиеся записи, если кэш переполнен."""
+        conn = self._connect()
+        with conn:
+            count = conn.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+            if count > self.max_entries:
+                low_water = int(self.max_entries * 0.9)
+                conn.execute(
+                    'DELETE FROM results WHERE key IN ('
+                    'SELECT key FROM results ORDER BY last_used LIMIT ?)',
+                    (count - low_water,)
+                )
+
+    def clear(self):
+        """Удаляет все записи из кэша."""
+        conn = self._connect()
+        with conn:
+            conn.execute('DELETE FROM results')
+
+    def __len__(self) -> int:
+        return self._connect().execute(
+            'SELECT COUNT(*) FROM results'
+        ).fetchone()[0]
+
+
+def cached_calculate_loan(
+    cache: Optional[ResultCache],
+    principal: float,
+    rate: float,
+    term_months: int,
+    start_date: Optional[str] = None,
+    early_payments: Optional[Dict] = None
+) -> Dict:
+    """
+    Обёртка над calculate_loan, использующая кэш (если он задан).
+
+    Результат из кэша общий для всех дат получения кредита: даты платежей
+    пересчитываются под start_date. Ошибки SQLite не прерывают запрос:
+    результат просто рассчитывается заново.
+    """
+    if start_date is None:
+        start_date = datetime.now().strftime('%Y-%m-%d')
+    early_payments = normalize_early_payments(early_payments)
+
+    if cache is None:
+        return calculate_loan(principal, rate, term_months, start_date, early_payments)
+
+    key = make_cache_key(principal, rate, term_months, early_payments)
+    try:
+        result = cache.get(key)
+    except sqlite3.Error:
+        logger.exception('Ошибка чтения кэша результатов')
+        result = None
+
+    if result is not None:
+        return apply_start_date(result, start_date)
+
+    result = calculate_loan(principal, rate, term_months, start_date, early_payments)
+    try:
+        cache.set(key, result)
+    except sqlite3.Error:
+        logger.exception('Ошибка записи в кэш результатов')
+    return result
+
+
+def warm_up(cache: ResultCache, offers: Iterable[Dict]) -> int:
+    """
+    Предварительно заполняет кэш популярными предложениями.
+
+    Некорректные предложения пропускаются с записью в лог. Дата получения
+    кредита в ключ кэша не входит, поэтому прогрев достаточно выполнить один раз.
+
+    Args:
+        cache: Кэш результатов
+        offers: Список словарей с полями principal, rate, term_months
+            и (опционально) early_payments
+
+    Returns:
+        int: Количество успешно обработанных предложений
+    """
+    count = 0
+    for index, offer in enumerate(offers):
+        try:
+            cached_calculate_loan(
+                cache,
+                principal=float(offer['principal']),
+                rate=float(offer['rate']),
+                term_months=int(offer['term_months']),
+                early_payments=offer.get('early_payments')
+            )
+        except Exception:
+            logger.warning('Пропущено некорректное предложение #%d: %r', index, offer,
+                           exc_info=True)
+            continue
+        count += 1
+    return count
+
+
+def load_offers(filepath: str) -> list:
+    """Загружает список популярных предложений из JSON-файла."""
+    with open(filepath, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(argv: Optional[list] = None) -> int:
+    """Прогрев кэша из командной строки (запускается один раз, а не в каждом воркере)."""
+    parser = argparse.ArgumentParser(description='Прогрев кэша результатов расчёта')
+    parser.add_argument('cache_path', help='Путь к файлу кэша SQLite')
+    parser.add_argument('offers', help='JSON-файл со списком популярных предложений')
+    parser.add_argument('--max-entries', type=int, default=10000,
+                        help='Максимальное количество записей в кэше')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        offers = load_offers(args.offers)
+        cache = ResultCache(args.cache_path, max_entries=args.max_entries)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"✗ Ошибка прогрева кэша: {e}")
+        return 1
+
+    count = warm_up(cache, offers)
+    cache.evict()
+    print(f"✓ Прогрето предложений: {count} из {len(offers)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
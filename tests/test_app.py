@@ -0,0 +1,55 @@
+"""
+Тесты API расчёта кредита с включённым и выключенным кэшем.
+"""
+
+import pytest
+
+pytest.importorskip('flask')
+
+import app as app_module
+from calculator import calculate_loan
+from result_cache import ResultCache
+
+
+PAYLOAD = {
+    'principal': 1000000,
+    'rate': 12,
+    'term_months': 36,
+    'start_date': '2025-01-01',
+    'early_payments': {'3': {'amount': 50000, 'mode': 'reduce_term'}},
+}
+
+EXPECTED = calculate_loan(
+    1000000, 12, 36, '2025-01-01', {3: {'amount': 50000.0, 'mode': 'reduce_term'}}
+)
+
+
+@pytest.fixture
+def client():
+    return app_module.app.test_client()
+
+
+def test_calculate_without_cache(client, monkeypatch):
+    monkeypatch.setattr(app_module, 'result_cache', None)
+
+    response = client.post('/api/calculate', json=PAYLOAD)
+
+    assert response.status_code == 200
+    assert response.get_json() == EXPECTED
+
+
+def test_repeated_calculate_is_served_from_cache(client, monkeypatch, tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache.db'))
+    monkeypatch.setattr(app_module, 'result_cache', cache)
+
+    first = client.post('/api/calculate', json=PAYLOAD)
+    assert len(cache) == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError('calculate_loan called on cache hit')
+
+    monkeypatch.setattr('result_cache.calculate_loan', fail)
+    second = client.post('/api/calculate', json=PAYLOAD)
+
+    assert first.status_code == second.status_code == 200
+    assert first.get_json() == second.get_json() == EXPECTED
@@ -0,0 +1,114 @@
+"""
+Тесты общего кэша результатов расчёта.
+"""
+
+import sqlite3
+from itertools import count
+
+import pytest
+
+import result_cache
+from calculator import calculate_loan
+from result_cache import (
+    ResultCache, cached_calculate_loan, make_cache_key,
+    normalize_early_payments, warm_up
+)
+
+
+EARLY = {3: {'amount': 50000.0, 'mode': 'reduce_term'},
+         6: {'amount': 20000.0, 'mode': 'reduce_payment'}}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(str(tmp_path / 'cache.db'), max_entries=3,
+                       evict_every=1, touch_interval=0)
+
+
+def test_cache_hit_matches_calculate_loan(cache):
+    expected = calculate_loan(1000000, 12, 36, '2025-01-01', EARLY)
+
+    first = cached_calculate_loan(cache, 1000000, 12, 36, '2025-01-01', EARLY)
+    second = cached_calculate_loan(cache, 1000000, 12, 36, '2025-01-01', EARLY)
+
+    assert first == expected
+    assert second == expected
+    assert len(cache) == 1
+
+
+def test_lru_eviction(cache, monkeypatch):
+    clock = count(1)
+    monkeypatch.setattr(result_cache.time, 'time', lambda: next(clock))
+
+    for key in ('a', 'b', 'c'):
+        cache.set(key, {'value': key})
+    cache.get('a')
+    cache.set('d', {'value': 'd'})
+
+    # Лимит 3 превышен: удаляются самые старые записи до 90% лимита
+    assert len(cache) == 2
+    assert cache.get('a') == {'value': 'a'}
+    assert cache.get('d') == {'value': 'd'}
+    assert cache.get('b') is None
+    assert cache.get('c') is None
+
+
+def test_key_ignores_number_format():
+    assert make_cache_key(1e6, 12, 36) == make_cache_key(1000000, 12.0, 36)
+
+
+def test_key_ignores_early_payment_order():
+    reordered = {6: EARLY[6], 3: EARLY[3]}
+    assert make_cache_key(1e6, 12, 36, EARLY) == make_cache_key(1e6, 12, 36, reordered)
+
+
+def test_hit_with_other_start_date_recomputes_payment_dates(cache):
+    cached_calculate_loan(cache, 1000000, 12, 36, '2025-01-01', EARLY)
+
+    result = cached_calculate_loan(cache, 1000000, 12, 36, '2025-06-15', EARLY)
+
+    assert result == calculate_loan(1000000, 12, 36, '2025-06-15', EARLY)
+    assert len(cache) == 1
+
+
+def test_str_and_int_months_are_normalized(cache):
+    str_early = {str(month): payment for month, payment in EARLY.items()}
+    assert normalize_early_payments(str_early) == EARLY
+
+    expected = calculate_loan(1000000, 12, 36, '2025-01-01', EARLY)
+    cached_calculate_loan(cache, 1000000, 12, 36, '2025-01-01', EARLY)
+    assert cached_calculate_loan(cache, 1000000, 12, 36, '2025-01-01', str_early) == expected
+    assert len(cache) == 1
+
+
+def test_version_change_clears_cache(tmp_path, monkeypatch):
+    path = str(tmp_path / 'cache.db')
+    ResultCache(path).set('key', {'value': 1})
+    assert len(ResultCache(path)) == 1
+
+    monkeypatch.setattr(result_cache, '_calculator_version', lambda: 'other')
+    assert len(ResultCache(path)) == 0
+
+
+def test_warm_up_fills_cache_and_skips_bad_offers(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache.db'))
+    offers = [
+        {'principal': 1000000, 'rate': 12, 'term_months': 36},
+        {'principal': 500000, 'rate': 9.5, 'term_months': 24,
+         'early_payments': {'3': {'amount': 10000}}},
+        {'rate': 12, 'term_months': 36},
+    ]
+
+    assert warm_up(cache, offers) == 2
+    assert len(cache) == 2
+
+
+def test_sqlite_error_falls_back_to_calculation(cache, monkeypatch):
+    def broken(*args, **kwargs):
+        raise sqlite3.OperationalError('database is locked')
+
+    monkeypatch.setattr(cache, 'get', broken)
+    monkeypatch.setattr(cache, 'set', broken)
+
+    result = cached_calculate_loan(cache, 1000000, 12, 36, '2025-01-01')
+    assert result == calculate_loan(1000000, 12, 36, '2025-01-01')